@@ -608,20 +608,131 @@ Task Dialog - Always-on-top dialog for task input (Wayland compatible)
 Task Dialog - Always-on-top dialog for task input (Wayland compatible)
 """
 
+import os
+import shlex
 import sys
 import subprocess
+
+
+# Taskwarrior 的待处理任务数据文件，任务变化时会被改写
+_PENDING_DATA = os.path.expanduser("~/.task/pending.data")
+
+# 未来 23 小时内到期的待处理任务
+_TASK_COUNT_FILTER = ("due.before:now+23h", "status:pending", "-OVERDUE", "-INSTANCE")
+
+# 只读查询时关闭垃圾回收、周期任务生成和钩子，减少 task 启动开销，
+# 同时避免查询本身改写 pending.data 而触发文件监听
+_TASK_QUERY_RC = ("rc.verbose=nothing", "rc.gc=off", "rc.recurrence=no", "rc.hooks=off")
+
+# 添加任务后在同一个 shell 中接着查询任务数，省去一次单独的进程启动；
+# 添加成功后先输出标记，以便区分是添加失败还是查询失败
+_ADDED_MARKER = "__task_added__"
+_ADD_AND_COUNT_SH = f'task add "$@" >/dev/null && echo {_ADDED_MARKER} && exec ' + shlex.join(
+    ["task", *_TASK_QUERY_RC, *_TASK_COUNT_FILTER, "count"]
+)
+
+
+def _has_valid_tasks():
+    try:
+        result = subprocess.run(
+            ["task", *_TASK_QUERY_RC, *_TASK_COUNT_FILTER, "count"],
+            capture_output=True,
+            text=True
+        )
+        return int(result.stdout.strip()) > 0
+    except:
+        return False
+
+
+# 先检查是否需要显示：已有任务时在导入 PyQt6 之前直接退出
+if __name__ == "__main__" and _has_valid_tasks():
+    sys.exit(0)
+
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
-    QLabel, QLineEdit, QPushButton, QFrame
+    QLabel, QLineEdit, QPushButton
+)
+from PyQt6.QtCore import (
+    Qt, QTimer, QPoint, QEvent, QElapsedTimer, QFileSystemWatcher, QProcess
 )
-from PyQt6.QtCore import Qt, QTimer, QPoint
 from PyQt6.QtGui import QFont, QMouseEvent
 
 
+# 界面字体（QFont 按值传递，可在多个控件间复用）
+_TITLE_FONT = QFont()
+_TITLE_FONT.setPointSize(18)
+_TITLE_FONT.setBold(True)
+
+_SUBTITLE_FONT = QFont()
+_SUBTITLE_FONT.setPointSize(13)
+
+_HELP_FONT = QFont()
+_HELP_FONT.setPointSize(12)
+
+_INPUT_FONT = QFont("", 13)
+_STATUS_FONT = QFont("", 10)
+
+# 界面文本与样式表
+_HELP_HTML = """<b>格式：</b>任务描述 due:到期时间<br><br>
+<b>示例：</b><br>
+&nbsp;&nbsp;• 完成报告 due:today<br>
+&nbsp;&nbsp;• 开会讨论 due:tomorrow<br>
+&nbsp;&nbsp;• 回复邮件 due:2h<br>
+&nbsp;&nbsp;• 提交文档 due:eod"""
+
+_WIDGET_QSS = """
+    QWidget {
+        background-color: #fafafa;
+        border-radius: 12px;
+    }
+"""
+
+_ENTRY_QSS = """
+    QLineEdit {
+        border: 2px solid #ccc;
+        border-radius: 8px;
+        padding: 8px 12px;
+        background: white;
+    }
+    QLineEdit:focus {
+        border-color: #3584e4;
+    }
+"""
+
+_BTN_QSS = """
+    QPushButton {
+        background-color: #3584e4;
+        color: white;
+        border: none;
+        border-radius: 8px;
+        padding: 10px 20px;
+    }
+    QPushButton:hover {
+        background-color: #1c71d8;
+    }
+    QPushButton:pressed {
+        background-color: #1a5fb4;
+    }
+"""
+
+# 状态标签按 state 属性切换样式，切换时无需重新解析样式表
+_STATUS_QSS = """
+    QLabel[state="err"] { color: #c01c28; font-weight: bold; }
+    QLabel[state="warn"] { color: #e5a50a; font-weight: bold; }
+    QLabel[state="ok"] { color: #26a269; font-weight: bold; }
+    QLabel[state="info"] { color: #888; font-style: italic; }
+"""
+
+
 class TaskDialog(QWidget):
     def __init__(self):
         super().__init__()
         
+        # 失去激活后延迟补一次置顶；先于其他初始化创建，event() 可能更早被调用
+        self._raise_timer = QTimer(self)
+        self._raise_timer.setSingleShot(True)
+        self._raise_timer.timeout.connect(self.raise_)
+        
         # 关键：使用和你代码相同的窗口标志
         self.setWindowFlags(
             Qt.WindowType.Tool |
@@ -643,28 +754,40 @@ class TaskDialog(QWidget):
         self.move(x, y)
         
         # 样式
-        self.setStyleSheet("""
-            QWidget {
-                background-color: #fafafa;
-                border-radius: 12px;
-            }
-        """)
+        self.setStyleSheet(_WIDGET_QSS)
         
         # 拖动支持
         self.dragging = False
         self.offset = QPoint()
+        # 拖动时按帧率节流窗口移动
+        self._move_clock = QElapsedTimer()
+        self._move_clock.start()
         
         self.initUI()
         
-        # 定时检查任务
-        self.check_timer = QTimer()
-        self.check_timer.timeout.connect(self.check_tasks_external)
-        self.check_timer.start(2000)
+        # 监听任务数据文件及其所在目录（首次使用时文件可能尚不存在），外部添加任务时才检查
+        self.fs_watcher = QFileSystemWatcher(self)
+        for path in (_PENDING_DATA, os.path.dirname(_PENDING_DATA)):
+            if os.path.exists(path):
+                self.fs_watcher.addPath(path)
+        self.fs_watcher.fileChanged.connect(self.check_tasks_external)
+        self.fs_watcher.directoryChanged.connect(self.check_tasks_external)
         
-        # 定时确保置顶
-        self.top_timer = QTimer()
-        self.top_timer.timeout.connect(self.ensure_on_top)
-        self.top_timer.start(500)
+        # 兜底的低频检查：已有任务随时间进入 23 小时范围时数据文件不会变化
+        self.recheck_timer = QTimer(self)
+        self.recheck_timer.timeout.connect(self.check_tasks_external)
+        self.recheck_timer.start(60 * 1000)
+        
+        # 通过 QProcess 异步调用 task，避免阻塞界面
+        self._adder = QProcess(self)
+        self._adder.finished.connect(self._on_add_done)
+        self._adder.errorOccurred.connect(self._on_add_error)
+        self._probe = QProcess(self)
+        self._probe.finished.connect(self._on_probe_done)
+        self._probe_again = False
+        self._check_after_add = False
+        self._add_args = []
+        self._accepted = False
     
     def initUI(self):
         layout = QVBoxLayout(self)
@@ -675,10 +798,7 @@ class TaskDialog(QWidget):
         title_bar = QHBoxLayout()
         
         title = QLabel("⚠️ 您在未来 23 小时内没有待处理的任务！")
-        title_font = QFont()
-        title_font.setPointSize(18)
-        title_font.setBold(True)
-        title.setFont(title_font)
+        title.setFont(_TITLE_FONT)
         title.setStyleSheet("color: #c01c28;")
         title_bar.addWidget(title)
         
@@ -688,82 +808,36 @@ class TaskDialog(QWidget):
         
         # 副标题
         subtitle = QLabel("请添加一个任务来关闭此窗口。")
-        subtitle_font = QFont()
-        subtitle_font.setPointSize(13)
-        subtitle.setFont(subtitle_font)
-        subtitle.setStyleSheet("color: #555;")
+        subtitle.setFont(_SUBTITLE_FONT)
+        # 底部边框作为分隔线
+        subtitle.setStyleSheet("color: #555; border-bottom: 1px solid #ddd; border-radius: 0; padding-bottom: 8px;")
         subtitle.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(subtitle)
         
-        # 分隔线
-        line1 = QFrame()
-        line1.setFrameShape(QFrame.Shape.HLine)
-        line1.setStyleSheet("background-color: #ddd;")
-        line1.setFixedHeight(1)
-        layout.addWidget(line1)
-        
         # 帮助文本
-        help_text = QLabel("""<b>格式：</b>任务描述 due:到期时间<br><br>
-<b>示例：</b><br>
-&nbsp;&nbsp;• 完成报告 due:today<br>
-&nbsp;&nbsp;• 开会讨论 due:tomorrow<br>
-&nbsp;&nbsp;• 回复邮件 due:2h<br>
-&nbsp;&nbsp;• 提交文档 due:eod""")
+        help_text = QLabel(_HELP_HTML)
         help_text.setTextFormat(Qt.TextFormat.RichText)
-        help_font = QFont()
-        help_font.setPointSize(12)
-        help_text.setFont(help_font)
-        help_text.setStyleSheet("color: #333;")
+        help_text.setFont(_HELP_FONT)
+        help_text.setStyleSheet("color: #333; border-bottom: 1px solid #ddd; border-radius: 0; padding-bottom: 8px;")
         layout.addWidget(help_text)
         
-        # 分隔线
-        line2 = QFrame()
-        line2.setFrameShape(QFrame.Shape.HLine)
-        line2.setStyleSheet("background-color: #ddd;")
-        line2.setFixedHeight(1)
-        layout.addWidget(line2)
-        
         # 输入区域
         input_layout = QHBoxLayout()
         
         self.entry = QLineEdit()
         self.entry.setPlaceholderText("输入任务，例如：完成报告 due:today")
-        self.entry.setFont(QFont("", 13))
+        self.entry.setFont(_INPUT_FONT)
         self.entry.setMinimumHeight(45)
-        self.entry.setStyleSheet("""
-            QLineEdit {
-                border: 2px solid #ccc;
-                border-radius: 8px;
-                padding: 8px 12px;
-                background: white;
-            }
-            QLineEdit:focus {
-                border-color: #3584e4;
-            }
-        """)
+        self.entry.setStyleSheet(_ENTRY_QSS)
         self.entry.returnPressed.connect(self.on_submit)
         input_layout.addWidget(self.entry)
         
         submit_btn = QPushButton("添加任务")
-        submit_btn.setFont(QFont("", 13))
+        submit_btn.setFont(_INPUT_FONT)
         submit_btn.setMinimumHeight(45)
         submit_btn.setMinimumWidth(120)
         submit_btn.setCursor(Qt.CursorShape.PointingHandCursor)
-        submit_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #3584e4;
-                color: white;
-                border: none;
-                border-radius: 8px;
-                padding: 10px 20px;
-            }
-            QPushButton:hover {
-                background-color: #1c71d8;
-            }
-            QPushButton:pressed {
-                background-color: #1a5fb4;
-            }
-        """)
+        submit_btn.setStyleSheet(_BTN_QSS)
         submit_btn.clicked.connect(self.on_submit)
         input_layout.addWidget(submit_btn)
         
@@ -772,16 +846,13 @@ class TaskDialog(QWidget):
         # 状态标签
         self.status_label = QLabel("提示：此窗口将保持打开直到您添加有效任务（可拖动窗口）")
         self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.status_label.setFont(QFont("", 10))
-        self.status_label.setStyleSheet("color: #888; font-style: italic;")
+        self.status_label.setFont(_STATUS_FONT)
+        self.status_label.setProperty("state", "info")
+        self.status_label.setStyleSheet(_STATUS_QSS)
         layout.addWidget(self.status_label)
         
         layout.addStretch()
     def closeEvent(self, event):
-        # 停止所有定时器（虽然 quit 会自动处理，但这样更保险）
-        self.check_timer.stop()
-        self.top_timer.stop()
-        
         # 强制退出应用程序事件循环
         QApplication.quit()
         
@@ -795,15 +866,25 @@ class TaskDialog(QWidget):
     
     def mouseMoveEvent(self, event: QMouseEvent):
         if self.dragging:
+            if self._move_clock.elapsed() < 8:
+                return
+            self._move_clock.restart()
             self.move(event.globalPosition().toPoint() - self.offset)
     
     def mouseReleaseEvent(self, event: QMouseEvent):
         if event.button() == Qt.MouseButton.LeftButton:
+            # 补上节流期间被跳过的最后一次移动
+            if self.dragging:
+                self.move(event.globalPosition().toPoint() - self.offset)
             self.dragging = False
     
-    def ensure_on_top(self):
-        self.raise_()
-        self.activateWindow()
+    # 失去激活时才重新置顶，替代周期性轮询
+    def event(self, e):
+        if e.type() == QEvent.Type.WindowDeactivate and self.isVisible():
+            self.raise_()
+            # 部分 Wayland 合成器会忽略置顶提示，延迟再补一次（重复触发只会重新计时）
+            self._raise_timer.start(2000)
+        return super().event(e)
     
     def on_submit(self):
         task_input = self.entry.text().strip()
@@ -812,71 +893,123 @@ class TaskDialog(QWidget):
             self.show_error("请输入任务内容")
             return
         
+        # 上一次添加尚未完成
+        if self._adder.state() != QProcess.ProcessState.NotRunning:
+            return
+        
+        # 按 shell 规则拆分，支持带引号的任务描述；
+        # 引号不成对（如 it's done）时退回按空白拆分
         try:
-            result = subprocess.run(
-                ["task", "add"] + task_input.split(),
-                capture_output=True,
-                text=True
-            )
-            
-            if result.returncode != 0:
-                self.show_error(f"添加失败：{result.stderr}")
-                return
-                
-        except Exception as e:
-            self.show_error(f"执行错误：{e}")
+            args = shlex.split(task_input)
+        except ValueError:
+            args = task_input.split()
+        
+        self._add_args = args
+        self._adder.start("sh", ["-c", _ADD_AND_COUNT_SH, "sh", *args])
+    
+    def _on_add_done(self, exit_code, exit_status):
+        ok = exit_status == QProcess.ExitStatus.NormalExit and exit_code == 0
+        words = bytes(self._adder.readAllStandardOutput()).decode(errors="replace").split()
+        
+        # 直接调用 task add 时只看退出码；合并命令则看是否输出了添加成功的标记
+        added = ok if self._adder.program() == "task" else _ADDED_MARKER in words
+        if not added:
+            stderr = bytes(self._adder.readAllStandardError()).decode(errors="replace")
+            self.show_error(f"添加失败：{stderr}")
             return
         
-        if self.has_valid_tasks():
-            self.show_success()
-            QTimer.singleShot(1000, QApplication.quit)
+        if self._adder.program() == "sh" and ok and words[-1].isdigit():
+            self.handle_count(int(words[-1]), after_add=True)
         else:
-            self.show_warning("任务已添加，但到期时间不在未来 23 小时内")
-            self.entry.clear()
+            # 回退路径或任务数查询失败：任务已添加，再单独查询一次
+            self._check_after_add = True
+            self.start_probe()
+    
+    def _on_add_error(self, error):
+        if error != QProcess.ProcessError.FailedToStart:
+            return
+        
+        # sh 不可用时退回直接调用 task add（需等 QProcess 完成失败处理后再启动）
+        if self._adder.program() == "sh":
+            QTimer.singleShot(0, lambda: self._adder.start("task", ["add", *self._add_args]))
+        else:
+            self.show_error(f"执行错误：{self._adder.errorString()}")
     
-    def has_valid_tasks(self):
+    def start_probe(self):
+        if self._probe.state() == QProcess.ProcessState.NotRunning:
+            self._probe.start("task", [*_TASK_QUERY_RC, *_TASK_COUNT_FILTER, "count"])
+        else:
+            # 正在运行的查询可能早于最新改动，结束后再查一次
+            self._probe_again = True
+    
+    def _on_probe_done(self, exit_code, exit_status):
+        if self._probe_again:
+            self._probe_again = False
+            self.start_probe()
+            return
+        
+        # 添加成功后不再处理
+        if self._accepted:
+            return
+        
         try:
-            result = subprocess.run(
-                ["task", "due.before:now+23h", "status:pending", "-OVERDUE", "-INSTANCE" "count"],
-                capture_output=True,
-                text=True
-            )
-            return int(result.stdout.strip()) > 0
-        except:
-            return False
+            count = int(bytes(self._probe.readAllStandardOutput()).decode().strip())
+        except ValueError:
+            count = 0
+        
+        after_add, self._check_after_add = self._check_after_add, False
+        self.handle_count(count, after_add)
+    
+    def handle_count(self, count, after_add=False):
+        if count > 0:
+            if after_add:
+                self._accepted = True
+                # 提交期间的文件变化已由 check_tasks_external 跳过；
+                # 这里再停止监听和兜底检查，退出前的 300 ms 内不会启动新的查询
+                self.recheck_timer.stop()
+                watched = self.fs_watcher.files() + self.fs_watcher.directories()
+                if watched:
+                    self.fs_watcher.removePaths(watched)
+                self.show_success()
+                QTimer.singleShot(300, QApplication.quit)
+            else:
+                QApplication.quit()
+        elif after_add:
+            self.show_warning("任务已添加，但到期时间不在未来 23 小时内")
+            self.entry.clear()
     
     def check_tasks_external(self):
-        if self.has_valid_tasks():
-            self.check_timer.stop()
-            self.top_timer.stop()
-            QApplication.quit()
+        # 文件新建或被替换写入（会移出监听列表）后需要重新添加
+        if _PENDING_DATA not in self.fs_watcher.files() and os.path.exists(_PENDING_DATA):
+            self.fs_watcher.addPath(_PENDING_DATA)
+        
+        # 添加过程中或添加成功后，任务数由 _on_add_done 的合并查询给出，无需再查
+        if self._accepted or self._adder.state() != QProcess.ProcessState.NotRunning:
+            return
+        
+        self.start_probe()
+    
+    def set_status(self, state, text):
+        self.status_label.setProperty("state", state)
+        # 属性变化后需重新 polish 才能套用对应选择器
+        style = self.status_label.style()
+        style.unpolish(self.status_label)
+        style.polish(self.status_label)
+        self.status_label.setText(text)
     
     def show_error(self, msg):
-        self.status_label.setText(f"❌ {msg}")
-        self.status_label.setStyleSheet("color: #c01c28; font-weight: bold;")
+        self.set_status("err", f"❌ {msg}")
     
     def show_warning(self, msg):
-        self.status_label.setText(f"⚠️ {msg}")
-        self.status_label.setStyleSheet("color: #e5a50a; font-weight: bold;")
+        self.set_status("warn", f"⚠️ {msg}")
     
     def show_success(self):
-        self.status_label.setText("✓ 任务已成功添加！")
-        self.status_label.setStyleSheet("color: #26a269; font-weight: bold;")
+        self.set_status("ok", "✓ 任务已成功添加！")
 
 
 def main():
-    # 先检查是否需要显示
-    try:
-        result = subprocess.run(
-            ["task", "due.before:now+23h", "status:pending", "-OVERDUE", "-INSTANCE", "count"],
-            capture_output=True,
-            text=True
-        )
-        if int(result.stdout.strip()) > 0:
-            sys.exit(0)
-    except:
-        pass
-    
+    # 合并高频输入事件（如拖动时的鼠标移动）
+    QApplication.setAttribute(Qt.ApplicationAttribute.AA_CompressHighFrequencyEvents, True)
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
     